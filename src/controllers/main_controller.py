@@ -2,11 +2,16 @@ import asyncio
 import os
 import threading
 import traceback
+from concurrent.futures import Future
+from dataclasses import replace
 from pathlib import Path
 from tkinter import filedialog
+from typing import Any, Iterator, Optional
 
 import speech_recognition as sr
 import utils.audio_utils as au
+import utils.config_manager as cm
+import utils.dict_utils as du
 from handlers.audio_handler import AudioHandler
 from handlers.google_api_handler import GoogleApiHandler
 from handlers.openai_api_handler import OpenAiApiHandler
@@ -26,6 +31,13 @@ class MainController:
 
         self._whisperx_handler = WhisperXHandler()
 
+        # Run every transcription on the same background event loop instead of
+        # creating a new one each time
+        self._event_loop = asyncio.new_event_loop()
+        threading.Thread(target=self._event_loop.run_forever, daemon=True).start()
+
+        self._preload_align_model()
+
     # PUBLIC METHODS
 
     def select_file(self) -> None:
@@ -88,12 +100,9 @@ class MainController:
                 else:
                     raise ValueError("No YouTube video URL provided. Please enter one.")
 
-            threading.Thread(
-                target=lambda loop: loop.run_until_complete(
-                    self._handle_transcription_process()
-                ),
-                args=(asyncio.new_event_loop(),),
-            ).start()
+            asyncio.run_coroutine_threadsafe(
+                self._handle_transcription_process(), self._event_loop
+            )
 
         except Exception as e:
             self._handle_exception(e)
@@ -151,8 +160,7 @@ class MainController:
         ]:
             if self.transcription.text:
                 if should_overwrite or not os.path.exists(save_file_path):
-                    with open(save_file_path, "w", encoding="utf-8") as file:
-                        file.write(self.transcription.text)
+                    save_file_path.write_bytes(self.transcription.text.encode("utf-8"))
             else:
                 exception = ValueError(
                     "There is no transcription available. Please generate it again."
@@ -178,7 +186,7 @@ class MainController:
                             for transcription.
         :return: None
         """
-        is_file_supported = file_path.suffix.lower() in c.SUPPORTED_FILE_EXTENSIONS
+        is_file_supported = file_path.suffix.lower() in c.SUPPORTED_FILE_EXTENSIONS_SET
         if file_path.is_file() and is_file_supported:
             self.transcription.audio_source_path = file_path
         else:
@@ -237,11 +245,10 @@ class MainController:
         :return: None
         """
         if files := self._get_files_to_transcribe_from_directory():
-            # Create a list of coroutines for each file transcription task
-            tasks = [self._transcribe_file(file) for file in files]
-
-            # Run all tasks concurrently
-            await asyncio.gather(*tasks)
+            if self.transcription.method == TranscriptionMethod.WHISPERX:
+                await self._transcribe_files_in_batches(files)
+            else:
+                await self._transcribe_files_concurrently(files)
 
             self.view.display_text(f"Files from '{dir_path}' successfully transcribed.")
         else:
@@ -262,25 +269,93 @@ class MainController:
         :type file_path: Path
         :return: None
         """
-        transcription = self.transcription
-        transcription.audio_source_path = file_path
+        # Work on a copy so that concurrent directory tasks don't overwrite each
+        # other's source path
+        transcription = replace(self.transcription, audio_source_path=file_path)
+        text = None
 
-        if self.transcription.method == TranscriptionMethod.GOOGLE_API:
-            self.transcription.text = AudioHandler.get_transcription(
+        if transcription.method == TranscriptionMethod.GOOGLE_API:
+            text = await AudioHandler.get_transcription(
                 transcription=transcription,
                 transcription_func=GoogleApiHandler.transcribe,
                 should_split_on_silence=True,
             )
-        elif self.transcription.method == TranscriptionMethod.WHISPER_API:
-            self.transcription.text = AudioHandler.get_transcription(
+        elif transcription.method == TranscriptionMethod.WHISPER_API:
+            text = await AudioHandler.get_transcription(
                 transcription=transcription,
                 transcription_func=OpenAiApiHandler.transcribe,
                 should_split_on_silence=False,
             )
-        elif self.transcription.method == TranscriptionMethod.WHISPERX:
-            self.transcription.text = await self._whisperx_handler.transcribe_file(
-                transcription
-            )
+        elif transcription.method == TranscriptionMethod.WHISPERX:
+            text = await self._whisperx_handler.transcribe_file(transcription)
+
+        self._handle_transcribed_file(file_path, text)
+
+    async def _transcribe_files_concurrently(self, files: list[Path]) -> None:
+        """
+        Transcribes the given files one by one with a bounded number of them running
+        at the same time, handling each file as soon as it finishes.
+
+        :param files: The paths of the files to transcribe.
+        :type files: list[Path]
+        :return: None
+        """
+        semaphore = asyncio.Semaphore(self._get_max_concurrent_files())
+
+        async def transcribe_file_bounded(file_path: Path) -> None:
+            async with semaphore:
+                await self._transcribe_file(file_path)
+
+        # Handle each task as soon as it finishes so that a failing or slow file
+        # doesn't hold back the rest
+        tasks = [transcribe_file_bounded(file) for file in files]
+
+        for task in asyncio.as_completed(tasks):
+            try:
+                await task
+            except Exception as e:
+                # Don't use `_handle_exception`, since it notifies the view that the
+                # process is over while other files are still being transcribed
+                print(traceback.format_exc())
+                self.view.display_text(repr(e))
+
+    async def _transcribe_files_in_batches(self, files: list[Path]) -> None:
+        """
+        Transcribes the given files with WhisperX, sharing the model batches between
+        files instead of running them one by one.
+
+        :param files: The paths of the files to transcribe.
+        :type files: list[Path]
+        :return: None
+        """
+        results = self._whisperx_handler.transcribe_files(self.transcription, files)
+
+        async for file_path, text, is_transcribed in results:
+            # Don't save anything for a failed file, so it's transcribed again in the
+            # next run instead of being skipped
+            if not is_transcribed:
+                print(f"Could not transcribe '{file_path}':\n{text}")
+                continue
+
+            try:
+                self._handle_transcribed_file(file_path, text)
+            except Exception:
+                print(traceback.format_exc())
+
+    def _handle_transcribed_file(self, file_path: Path, text: Optional[str]) -> None:
+        """
+        Updates the transcription object with the transcribed text of a file. If the
+        source type is microphone or YouTube, it removes the temporary file. It also
+        displays the transcribed text and saves it if autosave is enabled.
+
+        :param file_path: The path of the transcribed audio file.
+        :type file_path: Path
+        :param text: The transcribed text.
+        :type text: Optional[str]
+        :return: None
+        """
+        self.transcription.audio_source_path = file_path
+        self.transcription.text = text
 
         if self.transcription.audio_source in [AudioSource.MIC, AudioSource.YOUTUBE]:
             self.transcription.audio_source_path.unlink()  # Remove tmp file
@@ -295,6 +370,67 @@ class MainController:
                 should_overwrite=self.transcription.should_overwrite,
             )
 
+    def _preload_align_model(self) -> None:
+        """
+        Loads the WhisperX alignment model of the default language in the background
+        if the default configuration generates subtitles, so the first transcription
+        doesn't have to wait for it.
+
+        :return: None
+        """
+        config_transcription = cm.ConfigManager.get_config_transcription()
+        config_whisperx = cm.ConfigManager.get_config_whisperx()
+
+        is_whisperx = config_transcription.method == TranscriptionMethod.WHISPERX.value
+        should_subtitle = (
+            "srt" in config_whisperx.output_file_types
+            or "vtt" in config_whisperx.output_file_types
+        )
+
+        if is_whisperx and should_subtitle:
+            language_code = du.find_key_by_value(
+                dictionary=c.AUDIO_LANGUAGES,
+                target_value=config_transcription.language,
+            )
+
+            future = asyncio.run_coroutine_threadsafe(
+                asyncio.to_thread(
+                    self._whisperx_handler.preload_align_model, language_code
+                ),
+                self._event_loop,
+            )
+            future.add_done_callback(self._print_future_exception)
+
+    @staticmethod
+    def _print_future_exception(future: Future[Any]) -> None:
+        """
+        Prints the traceback of the exception raised by a background task, if any,
+        since nothing else waits for its result.
+
+        :param future: The future of the finished background task.
+        :type future: Future[Any]
+        :return: None
+        """
+        if not future.cancelled() and (e := future.exception()) is not None:
+            print("".join(traceback.format_exception(e)))
+
+    def _get_max_concurrent_files(self) -> int:
+        """
+        Determines how many files of a directory can be transcribed at the same time.
+
+        The value is taken from the `config.ini` file. If it's not a positive number,
+        it defaults to half of the CPU cores.
+
+        :return: The maximum number of files to transcribe concurrently.
+        :rtype: int
+        """
+        config_transcription = cm.ConfigManager.get_config_transcription()
+
+        if config_transcription.max_concurrent_files > 0:
+            return config_transcription.max_concurrent_files
+
+        return max((os.cpu_count() or 1) // 2, 1)
+
     def _get_files_to_transcribe_from_directory(self) -> list[Path]:
         """
         Retrieves a list of files to transcribe from a directory.
@@ -309,23 +445,58 @@ class MainController:
 
         matching_files = []
 
-        for root, _, files in os.walk(self.transcription.audio_source_path):
-            for file in files:
-                if any(file.endswith(ext) for ext in c.SUPPORTED_FILE_EXTENSIONS):
-                    file_path = Path(root) / file
+        for file_path, dir_file_names in self._iter_supported_files(
+            self.transcription.audio_source_path
+        ):
+            if not self.transcription.should_overwrite and any(
+                f"{file_path.stem}.{ext}" in dir_file_names
+                for ext in self.transcription.output_file_types
+            ):
+                print(f"{file_path} already has transcription(s). Skipping.")
+                continue
 
-                    if not self.transcription.should_overwrite and any(
-                        (file_path.with_suffix(f".{ext}")).exists()
-                        for ext in self.transcription.output_file_types
-                    ):
-                        print(f"{file_path} already has transcription(s). Skipping.")
-                        continue
-
-                    matching_files.append(file_path)
-                    print(f"{file_path} added to the list of files to transcribe!")
+            matching_files.append(file_path)
+            print(f"{file_path} added to the list of files to transcribe!")
 
         return matching_files
 
+    @staticmethod
+    def _iter_supported_files(dir_path: Path) -> Iterator[tuple[Path, set[str]]]:
+        """
+        Walks a directory and its subdirectories, yielding the supported files as
+        they're found. Hidden directories and symbolic links to directories are
+        skipped.
+
+        Each file comes with the names of the files in its directory, so that callers
+        can check for related files without querying the file system again.
+
+        :param dir_path: The directory to walk.
+        :type dir_path: Path
+        :return: An iterator of tuples with the path of each supported file and the
+                 names of the files in its directory.
+        :rtype: Iterator[tuple[Path, set[str]]]
+        """
+        pending_dirs = [str(dir_path)]
+
+        while pending_dirs:
+            with os.scandir(pending_dirs.pop()) as entries:
+                file_entries = []
+
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not entry.name.startswith("."):
+                            pending_dirs.append(entry.path)
+                    elif entry.is_file():
+                        file_entries.append(entry)
+
+            file_names = {entry.name for entry in file_entries}
+
+            for entry in file_entries:
+                extension = os.path.splitext(entry.name)[1].lower()
+
+                if extension in c.SUPPORTED_FILE_EXTENSIONS_SET:
+                    yield Path(entry.path), file_names
+
     def _start_recording_from_mic(self) -> None:
         """
         Records the audio from the microphone and starts the transcription process when
@@ -352,12 +523,9 @@ class MainController:
                 au.save_audio_data(audio_data, filename=filename)
                 self.transcription.audio_source_path = Path(filename)
 
-                threading.Thread(
-                    target=lambda loop: loop.run_until_complete(
-                        self._handle_transcription_process()
-                    ),
-                    args=(asyncio.new_event_loop(),),
-                ).start()
+                asyncio.run_coroutine_threadsafe(
+                    self._handle_transcription_process(), self._event_loop
+                )
             else:
                 e = ValueError("No audio detected")
                 self._handle_exception(e)
@@ -1,22 +1,31 @@
-import os
-import shutil
+import asyncio
+import subprocess
 import traceback
+import weakref
 from io import BytesIO
 from pathlib import Path
 from typing import Callable, Optional
 
 import speech_recognition as sr
+import utils.audio_utils as au
 from models.transcription import Transcription
-from moviepy.video.io.VideoFileClip import VideoFileClip
 from pydub import AudioSegment
-from pydub.silence import split_on_silence
+from pydub.exceptions import CouldntDecodeError
 from utils import constants as c
-from utils.path_helper import ROOT_PATH
 
 
 class AudioHandler:
+    # Maximum number of chunks sent to the transcription API at the same time, to
+    # avoid being rate limited. The limit is shared by all the files transcribed
+    # on the same event loop
+    _MAX_CONCURRENT_REQUESTS = 8
+    _request_semaphores: weakref.WeakKeyDictionary[
+        asyncio.AbstractEventLoop, asyncio.Semaphore
+    ] = weakref.WeakKeyDictionary()
+    _SAMPLE_RATE = 16000
+
     @staticmethod
-    def get_transcription(
+    async def get_transcription(
         transcription: Transcription,
         should_split_on_silence: bool,
         transcription_func: Callable[[sr.AudioData, Transcription], str],
@@ -39,71 +48,94 @@ class AudioHandler:
         :return: The transcribed text or an error message if transcription fails.
         :rtype: str
         """
-        chunks_directory = ROOT_PATH / "audio-chunks"
-        chunks_directory.mkdir(exist_ok=True)
-
         try:
-            audio = AudioHandler.load_audio_file(
-                transcription.audio_source_path, chunks_directory
+            audio = await asyncio.to_thread(
+                AudioHandler.load_audio_file, transcription.audio_source_path
             )
             if audio is None:
                 raise ValueError("Unsupported file type")
 
             if should_split_on_silence:
-                audio_chunks = AudioHandler.split_audio_into_chunks(audio)
+                audio_chunks = await asyncio.to_thread(
+                    AudioHandler.split_audio_into_chunks, audio
+                )
             else:
                 audio_chunks = [audio]
 
-            text = AudioHandler.process_audio_chunks(
-                audio_chunks, transcription, transcription_func, chunks_directory
+            text = await AudioHandler.process_audio_chunks(
+                audio_chunks, transcription, transcription_func
             )
 
         except Exception:
             text = traceback.format_exc()
 
-        finally:
-            AudioHandler.cleanup(chunks_directory)
-
         return text
 
     @staticmethod
-    def load_audio_file(
-        file_path: Path, chunks_directory: Path
-    ) -> Optional[AudioSegment]:
+    def load_audio_file(file_path: Path) -> Optional[AudioSegment]:
         """
         Load the audio from the file or extract it from the video.
 
+        The audio is decoded as 16 kHz mono, which is what the transcription APIs
+        expect, so the silence detection and the requests work with far fewer
+        samples than the original audio usually has.
+
         :param file_path: Path to the file to be loaded.
         :type file_path: Path
-        :param chunks_directory: Directory to store intermediate audio files.
-        :type chunks_directory: Path
+        :raises CouldntDecodeError: If ffmpeg fails to decode the file.
         :return: Loaded AudioSegment object or None if unsupported file type.
         :rtype: Optional[AudioSegment]
         """
-        content_type = file_path.suffix
+        if file_path.suffix.lower() not in c.SUPPORTED_FILE_EXTENSIONS_SET:
+            return None
 
-        if content_type in c.AUDIO_FILE_EXTENSIONS:
-            return AudioSegment.from_file(file_path)
-
-        elif content_type in c.VIDEO_FILE_EXTENSIONS:
-            clip = VideoFileClip(str(file_path))
-            video_audio_path = chunks_directory / f"{file_path.stem}.wav"
-            clip.audio.write_audiofile(video_audio_path)
-            return AudioSegment.from_wav(video_audio_path)
+        # Decode only the audio stream, skipping the video frames and cover art
+        try:
+            process = subprocess.run(
+                [
+                    "ffmpeg",
+                    "-nostdin",
+                    "-loglevel",
+                    "error",
+                    "-i",
+                    str(file_path),
+                    "-vn",
+                    "-ac",
+                    "1",
+                    "-ar",
+                    str(AudioHandler._SAMPLE_RATE),
+                    "-f",
+                    "s16le",
+                    "-",
+                ],
+                capture_output=True,
+                check=True,
+            )
+        except subprocess.CalledProcessError as e:
+            # The error of ffmpeg is only in its output, which the exception omits
+            raise CouldntDecodeError(
+                f"Decoding failed. ffmpeg returned error code: {e.returncode}\n\n"
+                f"Output from ffmpeg:\n\n{e.stderr.decode(errors='replace')}"
+            ) from e
 
-        return None
+        return AudioSegment(
+            data=process.stdout,
+            sample_width=2,
+            frame_rate=AudioHandler._SAMPLE_RATE,
+            channels=1,
+        )
 
     @staticmethod
-    def split_audio_into_chunks(sound: AudioSegment) -> AudioSegment:
+    def split_audio_into_chunks(sound: AudioSegment) -> list[AudioSegment]:
         """
         Split the audio into chunks based on silence.
 
         :param sound: The AudioSegment object to be split.
         :type sound: AudioSegment
         :return: List of audio chunks.
-        :rtype: AudioSegment
+        :rtype: list[AudioSegment]
         """
-        return split_on_silence(
+        return au.split_on_silence(
             sound,
             min_silence_len=500,  # Minimum duration of silence required to consider a segment as a split point
             silence_thresh=sound.dBFS
@@ -112,14 +144,16 @@ class AudioHandler:
         )
 
     @staticmethod
-    def process_audio_chunks(
+    async def process_audio_chunks(
         audio_chunks: list[AudioSegment],
         transcription: Transcription,
         transcription_func: Callable[[sr.AudioData, Transcription], str],
-        chunks_directory: Path,
     ) -> str:
         """
-        Process each audio chunk for transcription.
+        Process each audio chunk for transcription. The chunks are transcribed
+        concurrently, up to `_MAX_CONCURRENT_REQUESTS` at the same time across all
+        the files being transcribed, and their texts are combined in the original
+        order.
 
         :param audio_chunks: List of audio chunks.
         :type audio_chunks: list[AudioSegment]
@@ -127,44 +161,77 @@ class AudioHandler:
         :type transcription: Transcription
         :param transcription_func: The function to use for transcription.
         :type transcription_func: Callable[[sr.AudioData, Transcription], str]
-        :param chunks_directory: Directory to store intermediate audio files.
-        :type chunks_directory: Path
         :return: The combined transcribed text.
         :rtype: str
         """
-        recognizer = sr.Recognizer()
+        semaphore = AudioHandler._get_request_semaphore()
 
-        for idx, audio_chunk in enumerate(audio_chunks):
-            chunk_filename = os.path.join(chunks_directory, f"chunk{idx}.wav")
-            audio_chunk.export(chunk_filename, bitrate="64k", format="wav")
+        async def process_audio_chunk(audio_chunk: AudioSegment) -> str:
+            async with semaphore:
+                return await asyncio.to_thread(
+                    AudioHandler.transcribe_audio_chunk,
+                    audio_chunk,
+                    transcription,
+                    transcription_func,
+                )
 
-            with sr.AudioFile(chunk_filename) as source:
-                recognizer.adjust_for_ambient_noise(source)
-                audio_data = recognizer.record(source)
+        chunk_texts = await asyncio.gather(
+            *(process_audio_chunk(audio_chunk) for audio_chunk in audio_chunks)
+        )
 
-                try:
-                    chunk_text = transcription_func(
-                        audio_data,
-                        transcription,
-                    )
-                    print(f"chunk text: {chunk_text}")
-                    return chunk_text
+        return "".join(chunk_texts)
 
-                except Exception:
-                    return traceback.format_exc()
+    @staticmethod
+    def _get_request_semaphore() -> asyncio.Semaphore:
+        """
+        Get the semaphore that limits the requests sent from the running event loop,
+        creating it the first time it's requested.
 
-        return ""
+        :return: The semaphore of the running event loop.
+        :rtype: asyncio.Semaphore
+        """
+        loop = asyncio.get_running_loop()
+
+        if loop not in AudioHandler._request_semaphores:
+            AudioHandler._request_semaphores[loop] = asyncio.Semaphore(
+                AudioHandler._MAX_CONCURRENT_REQUESTS
+            )
+
+        return AudioHandler._request_semaphores[loop]
 
     @staticmethod
-    def cleanup(chunks_directory: Path) -> None:
+    def transcribe_audio_chunk(
+        audio_chunk: AudioSegment,
+        transcription: Transcription,
+        transcription_func: Callable[[sr.AudioData, Transcription], str],
+    ) -> str:
         """
-        Clean up the `chunks` directory.
+        Transcribe a single audio chunk.
 
-        :param chunks_directory: Directory to be deleted.
-        :type chunks_directory: Path
-        :rtype: None
+        :param audio_chunk: The audio chunk to transcribe.
+        :type audio_chunk: AudioSegment
+        :param transcription: Transcription object containing transcription details.
+        :type transcription: Transcription
+        :param transcription_func: The function to use for transcription.
+        :type transcription_func: Callable[[sr.AudioData, Transcription], str]
+        :return: The transcribed text of the chunk or an error message if
+                 transcription fails.
+        :rtype: str
         """
-        shutil.rmtree(chunks_directory)
+        # Pass the raw PCM samples directly instead of encoding them as WAV and
+        # reading them back, since `sr.AudioData` only needs mono PCM
+        audio_chunk = audio_chunk.set_channels(1)
+        audio_data = sr.AudioData(
+            audio_chunk.raw_data, audio_chunk.frame_rate, audio_chunk.sample_width
+        )
+
+        try:
+            chunk_text = transcription_func(audio_data, transcription)
+            print(f"chunk text: {chunk_text}")
+            return chunk_text
+
+        except Exception:
+            return traceback.format_exc()
 
     @staticmethod
     def compress_audio(audio_data: sr.AudioData) -> BytesIO:
@@ -3,7 +3,6 @@ import utils.config_manager as cm
 from handlers.audio_handler import AudioHandler
 from interfaces.transcribable import Transcribable
 from models.transcription import Transcription
-from openai import OpenAI
 from utils.enums import WhisperApiResponseFormats
 from utils.env_keys import EnvKeys
 
@@ -24,6 +23,9 @@ class OpenAiApiHandler(Transcribable):
             else None
         )
 
+        # Imported here to avoid loading the OpenAI client until it's needed
+        from openai import OpenAI
+
         client = OpenAI(
             api_key=EnvKeys.OPENAI_API_KEY.get_value(),
             timeout=120.0,  # 2 minutes
@@ -1,12 +1,22 @@
+import asyncio
+import gc
 import os
+import threading
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Union
+from typing import TYPE_CHECKING, Any, AsyncIterator, Iterator, Optional, Union
 
+import utils.cache_utils as cu
 import utils.config_manager as cm
-import whisperx
+from models.config.config_whisperx import ConfigWhisperX
 from models.transcription import Transcription
-from whisperx.types import AlignedTranscriptionResult, TranscriptionResult
+from utils.enums import AudioSource, ComputeType
+
+# WhisperX is imported where it's used instead, since importing it loads torch and
+# the rest of its dependencies, which slows down the startup of the app
+if TYPE_CHECKING:
+    from whisperx.types import AlignedTranscriptionResult, TranscriptionResult
 
 
 class WhisperXHandler:
@@ -14,6 +24,13 @@ class WhisperXHandler:
         self._whisperx_result: Optional[
             Union[TranscriptionResult, AlignedTranscriptionResult]
         ] = None
+        # Only the last model of each kind is kept, since they take up to a few GB
+        self._model: Any = None
+        self._model_key: Optional[tuple[Any, ...]] = None
+        self._align_model: Optional[tuple[Any, Any]] = None
+        self._align_model_key: Optional[tuple[Any, ...]] = None
+        self._model_cache_lock = threading.Lock()
+        self._align_model_cache_lock = threading.Lock()
 
     async def transcribe_file(self, transcription: Transcription) -> str:
         """
@@ -37,49 +54,230 @@ class WhisperXHandler:
         task = "translate" if transcription.should_translate else "transcribe"
 
         try:
-            model = whisperx.load_model(
+            import whisperx
+
+            cache_key = await asyncio.to_thread(
+                self._get_cache_key,
+                transcription.audio_source_path,
+                transcription,
+                config_whisperx,
+            )
+
+            if cache_key and (
+                cached_transcription := cu.load_cached_transcription(cache_key)
+            ):
+                self._whisperx_result = cached_transcription["result"]
+                return str(cached_transcription["text"])
+
+            # Run the blocking WhisperX calls in worker threads to keep the event loop
+            # responsive while the model is busy
+            model = await asyncio.to_thread(
+                self._get_model,
                 config_whisperx.model_size,
                 device,
-                compute_type=config_whisperx.compute_type,
-                task=task,
-                language=transcription.language_code,
+                config_whisperx.compute_type,
+                task,
+                transcription.language_code,
             )
 
             audio_path = str(transcription.audio_source_path)
-            audio = whisperx.load_audio(audio_path)
-            self._whisperx_result = model.transcribe(
-                audio, batch_size=config_whisperx.batch_size
+            audio = await asyncio.to_thread(whisperx.load_audio, audio_path)
+            whisperx_result = await asyncio.to_thread(
+                model.transcribe, audio, batch_size=config_whisperx.batch_size
             )
 
-            if self._whisperx_result is None:
+            if whisperx_result is None:
                 raise ValueError("Something went wrong while transcribing.")
 
             text_combined = " ".join(
-                segment["text"].strip() for segment in self._whisperx_result["segments"]
+                segment["text"].strip() for segment in whisperx_result["segments"]
             )
 
             # Align output if should subtitle
-            if (
-                "srt" in transcription.output_file_types
-                or "vtt" in transcription.output_file_types
-            ):
-                model_aligned, metadata = whisperx.load_align_model(
-                    language_code=transcription.language_code, device=device
-                )
-                self._whisperx_result = whisperx.align(
-                    self._whisperx_result["segments"],
-                    model_aligned,
-                    metadata,
+            if self._should_align(transcription):
+                whisperx_result = await asyncio.to_thread(
+                    self._align,
+                    whisperx_result,
                     audio,
+                    transcription.language_code,
                     device,
-                    return_char_alignments=False,
+                )
+
+            self._whisperx_result = whisperx_result
+
+            if cache_key:
+                await asyncio.to_thread(
+                    cu.save_cached_transcription,
+                    cache_key,
+                    {"text": text_combined, "result": whisperx_result},
                 )
 
             return text_combined
 
         except Exception:
+            self._whisperx_result = None
             return traceback.format_exc()
 
+    async def transcribe_files(
+        self, transcription: Transcription, file_paths: list[Path]
+    ) -> AsyncIterator[tuple[Path, str, bool]]:
+        """
+        Transcribe audio from several files using the WhisperX library. Instead of
+        transcribing them one by one, the speech segments of up to `batch_size` files
+        are fed to the model together so that the batches are kept full.
+
+        The result of each file is kept after yielding it, so it can be saved with
+        `save_transcription` before moving on to the next one. If a file fails, its
+        error is yielded instead of its text and there is no result to save.
+
+        :param transcription: An instance of Transcription containing the options of
+                              the transcription.
+        :type transcription: Transcription
+        :param file_paths: The paths of the audio files to transcribe.
+        :type file_paths: list[Path]
+        :return: An asynchronous iterator of tuples with the path of each file, its
+                 transcribed text or the error message if it failed, and whether it
+                 was transcribed successfully.
+        :rtype: AsyncIterator[tuple[Path, str, bool]]
+        """
+        if not transcription.output_file_types:
+            raise ValueError(
+                "No output file types specified. Please make sure to select at least "
+                "one."
+            )
+
+        config_whisperx = cm.ConfigManager.get_config_whisperx()
+
+        device = "cpu" if config_whisperx.use_cpu else "cuda"
+        task = "translate" if transcription.should_translate else "transcribe"
+        batch_size = config_whisperx.batch_size
+        pending_file_paths = []
+        cache_keys: dict[Path, Optional[str]] = {}
+
+        # Return the cached transcriptions first and only transcribe the rest
+        for file_path in file_paths:
+            cache_key = await asyncio.to_thread(
+                self._get_cache_key, file_path, transcription, config_whisperx
+            )
+
+            if cache_key and (
+                cached_transcription := cu.load_cached_transcription(cache_key)
+            ):
+                self._whisperx_result = cached_transcription["result"]
+                yield file_path, str(cached_transcription["text"]), True
+            else:
+                pending_file_paths.append(file_path)
+                cache_keys[file_path] = cache_key
+
+        if not pending_file_paths:
+            return
+
+        # Run the blocking WhisperX calls in worker threads to keep the event loop
+        # responsive while the model is busy
+        model = await asyncio.to_thread(
+            self._get_model,
+            config_whisperx.model_size,
+            device,
+            config_whisperx.compute_type,
+            task,
+            transcription.language_code,
+        )
+
+        import whisperx
+
+        # Load the files in groups to avoid keeping every decoded audio in memory
+        for i in range(0, len(pending_file_paths), max(batch_size, 1)):
+            group = []
+            audios = []
+
+            # Decode each file on its own so that a broken one doesn't drop the rest
+            for file_path in pending_file_paths[i : i + max(batch_size, 1)]:
+                try:
+                    audio = await asyncio.to_thread(whisperx.load_audio, str(file_path))
+                except Exception:
+                    self._whisperx_result = None
+                    yield file_path, traceback.format_exc(), False
+                    continue
+
+                group.append(file_path)
+                audios.append(audio)
+
+            if not audios:
+                continue
+
+            results: list[Union[TranscriptionResult, str]]
+
+            try:
+                results = await asyncio.to_thread(
+                    self._transcribe_batched, model, audios, batch_size
+                )
+            except Exception:
+                # Retry the files one by one to find out which of them failed
+                results = []
+
+                for audio in audios:
+                    try:
+                        results.append(
+                            await asyncio.to_thread(
+                                model.transcribe, audio, batch_size=batch_size
+                            )
+                        )
+                    except Exception:
+                        results.append(traceback.format_exc())
+
+            for file_path, audio, result in zip(group, audios, results):
+                if isinstance(result, str):
+                    self._whisperx_result = None
+                    yield file_path, result, False
+                    continue
+
+                try:
+                    text_combined = " ".join(
+                        segment["text"].strip() for segment in result["segments"]
+                    )
+                    whisperx_result: Union[
+                        TranscriptionResult, AlignedTranscriptionResult
+                    ] = result
+
+                    if self._should_align(transcription):
+                        whisperx_result = await asyncio.to_thread(
+                            self._align,
+                            result,
+                            audio,
+                            transcription.language_code,
+                            device,
+                        )
+
+                    self._whisperx_result = whisperx_result
+
+                    if cache_key := cache_keys[file_path]:
+                        await asyncio.to_thread(
+                            cu.save_cached_transcription,
+                            cache_key,
+                            {"text": text_combined, "result": whisperx_result},
+                        )
+
+                except Exception:
+                    self._whisperx_result = None
+                    yield file_path, traceback.format_exc(), False
+                    continue
+
+                yield file_path, text_combined, True
+
+    def preload_align_model(self, language_code: Optional[str]) -> None:
+        """
+        Load the alignment model of the given language ahead of time, so that the
+        first transcription that generates subtitles doesn't have to wait for it.
+
+        :param language_code: The language code of the alignment model to load.
+        :type language_code: Optional[str]
+        :return: None
+        """
+        config_whisperx = cm.ConfigManager.get_config_whisperx()
+        device = "cpu" if config_whisperx.use_cpu else "cuda"
+
+        self._get_align_model(language_code, device)
+
     def save_transcription(
         self,
         file_path: Path,
@@ -102,17 +300,346 @@ class WhisperXHandler:
                                 the given format.
         :type should_overwrite: bool
         """
+        import whisperx
+
         config_subtitles = cm.ConfigManager.get_config_subtitles()
         output_dir = file_path.parent
+        writers = []
 
         for output_type in output_file_types:
             path_to_check = file_path.parent / f"{file_path.stem}.{output_type}"
 
             if should_overwrite or not os.path.exists(path_to_check):
-                writer = whisperx.transcribe.get_writer(output_type, str(output_dir))
+                writers.append(
+                    whisperx.transcribe.get_writer(output_type, str(output_dir))
+                )
+
+        if not writers:
+            return
+
+        # https://github.com/m-bain/whisperX/issues/455#issuecomment-1707547704
+        if self._whisperx_result:
+            self._whisperx_result["language"] = "en"
+
+        # Write the different formats at the same time
+        with ThreadPoolExecutor(max_workers=len(writers)) as executor:
+            futures = [
+                executor.submit(
+                    writer, self._whisperx_result, file_path, vars(config_subtitles)
+                )
+                for writer in writers
+            ]
+
+            for future in futures:
+                future.result()  # Raise any exception from the writers
+
+    def _get_cache_key(
+        self,
+        file_path: Path,
+        transcription: Transcription,
+        config_whisperx: ConfigWhisperX,
+    ) -> Optional[str]:
+        """
+        Get the key under which the transcription of a file is cached, taking into
+        account every option that changes the WhisperX result.
+
+        Recordings from the microphone and YouTube downloads are temporary files that
+        are never transcribed twice, so they aren't cached.
+
+        :param file_path: The path of the audio file to transcribe.
+        :type file_path: Path
+        :param transcription: An instance of Transcription containing the options of
+                              the transcription.
+        :type transcription: Transcription
+        :param config_whisperx: The WhisperX configuration.
+        :type config_whisperx: ConfigWhisperX
+        :return: The cache key, or None if the transcription shouldn't be cached.
+        :rtype: Optional[str]
+        """
+        if not config_whisperx.cache_transcriptions or transcription.audio_source in [
+            AudioSource.MIC,
+            AudioSource.YOUTUBE,
+        ]:
+            return None
+
+        device = "cpu" if config_whisperx.use_cpu else "cuda"
+        options = (
+            config_whisperx.model_size,
+            self._resolve_compute_type(config_whisperx.compute_type, device),
+            transcription.should_translate,
+            transcription.language_code,
+            self._should_align(transcription),
+        )
+
+        try:
+            return cu.get_cache_key(file_path, options)
+        except OSError:
+            # Transcribe the file without caching it, which reports the error if it
+            # can't be read either
+            return None
+
+    def _get_model(
+        self,
+        model_size: str,
+        device: str,
+        compute_type: str,
+        task: str,
+        language_code: Optional[str],
+    ) -> Any:
+        """
+        Get the WhisperX model for the given options. The last loaded model is kept
+        and reused while the options don't change. If only the task or the language
+        change, its Whisper model is reused to build the new one, since its weights
+        are what take long to load.
+
+        :param model_size: The size of the Whisper model to load.
+        :type model_size: str
+        :param device: The device where the model will run ("cpu" or "cuda").
+        :type device: str
+        :param compute_type: The type used for the model computations. If it's
+                             "default", the fastest type for the device is used.
+        :type compute_type: str
+        :param task: The task to perform ("transcribe" or "translate").
+        :type task: str
+        :param language_code: The language code of the audio.
+        :type language_code: Optional[str]
+        :return: The loaded WhisperX model.
+        :rtype: Any
+        """
+        import whisperx
+
+        compute_type = self._resolve_compute_type(compute_type, device)
+        key = (model_size, device, compute_type, task, language_code)
+
+        with self._model_cache_lock:
+            if key == self._model_key:
+                return self._model
+
+            # The weights depend only on the size, device and compute type
+            if self._model_key is not None and self._model_key[:3] == key[:3]:
+                whisper_model = self._model.model
+            else:
+                whisper_model = None
+                self._release_model()
+
+            self._model = whisperx.load_model(
+                model_size,
+                device,
+                compute_type=compute_type,
+                task=task,
+                language=language_code,
+                model=whisper_model,
+                threads=os.cpu_count() or 4,
+            )
+            self._model_key = key
+
+            return self._model
+
+    def _release_model(self) -> None:
+        """
+        Drop the cached WhisperX model and free the memory it was using, so that a
+        different one can be loaded without keeping both in memory.
+
+        :return: None
+        """
+        if self._model_key is None:
+            return
+
+        device = self._model_key[1]
+        self._model = None
+        self._model_key = None
+
+        gc.collect()
+
+        if device == "cuda":
+            import torch
+
+            torch.cuda.empty_cache()
+
+    @staticmethod
+    def _resolve_compute_type(compute_type: str, device: str) -> str:
+        """
+        Get the compute type to load the model with. If the given one is "default",
+        it picks `int8` on the CPU, and `int8_float16` on CUDA GPUs with compute
+        capability 7.5 or higher or `float16` on older ones.
+
+        :param compute_type: The compute type from the configuration.
+        :type compute_type: str
+        :param device: The device where the model will run ("cpu" or "cuda").
+        :type device: str
+        :return: The compute type to load the model with.
+        :rtype: str
+        """
+        if compute_type != ComputeType.DEFAULT.value:
+            return compute_type
+
+        if device == "cpu":
+            return ComputeType.INT8.value
+
+        import torch
+
+        if torch.cuda.get_device_capability() >= (7, 5):
+            return ComputeType.INT8_FLOAT16.value
+
+        return ComputeType.FLOAT16.value
+
+    def _get_align_model(
+        self, language_code: Optional[str], device: str
+    ) -> tuple[Any, Any]:
+        """
+        Get the alignment model and its metadata for the given language. The last
+        loaded one is kept and reused while the language doesn't change.
+
+        :param language_code: The language code of the audio.
+        :type language_code: Optional[str]
+        :param device: The device where the model will run ("cpu" or "cuda").
+        :type device: str
+        :return: A tuple with the alignment model and its metadata.
+        :rtype: tuple[Any, Any]
+        """
+        import whisperx
+
+        key = (language_code, device)
+
+        with self._align_model_cache_lock:
+            if self._align_model is None or key != self._align_model_key:
+                # Drop the previous model before loading the new one
+                self._align_model = None
+                self._align_model = whisperx.load_align_model(
+                    language_code=language_code, device=device
+                )
+                self._align_model_key = key
+
+            return self._align_model
+
+    @staticmethod
+    def _transcribe_batched(
+        model: Any, audios: list[Any], batch_size: int
+    ) -> list["TranscriptionResult"]:
+        """
+        Transcribe several audios with a single pass through the model, so that the
+        speech segments of different audios share the same batches.
+
+        This follows what `FasterWhisperPipeline.transcribe` does for a single audio:
+        the audios are split into speech segments with the VAD model, every segment is
+        sent through the pipeline, and the outputs are split back into one result per
+        audio using the number of segments of each of them.
+
+        :param model: The WhisperX model to transcribe with.
+        :type model: Any
+        :param audios: The decoded audios to transcribe.
+        :type audios: list[Any]
+        :param batch_size: The number of segments to transcribe at the same time.
+        :type batch_size: int
+        :return: A transcription result for each of the audios, in the same order.
+        :rtype: list[TranscriptionResult]
+        """
+        # The language has to be detected for each audio separately
+        if model.tokenizer is None:
+            return [model.transcribe(audio, batch_size=batch_size) for audio in audios]
+
+        import torch
+        from whisperx.audio import SAMPLE_RATE
+        from whisperx.vad import merge_chunks
+
+        vad_segments_by_audio = []
+
+        for audio in audios:
+            vad_segments = model.vad_model(
+                {
+                    "waveform": torch.from_numpy(audio).unsqueeze(0),
+                    "sample_rate": SAMPLE_RATE,
+                }
+            )
+            vad_segments_by_audio.append(
+                merge_chunks(
+                    vad_segments,
+                    30,  # Chunk size in seconds, the same as WhisperX uses by default
+                    onset=model._vad_params["vad_onset"],
+                    offset=model._vad_params["vad_offset"],
+                )
+            )
+
+        def data() -> Iterator[dict[str, Any]]:
+            for audio, vad_segments in zip(audios, vad_segments_by_audio):
+                for vad_segment in vad_segments:
+                    start = int(vad_segment["start"] * SAMPLE_RATE)
+                    end = int(vad_segment["end"] * SAMPLE_RATE)
+                    yield {"inputs": audio[start:end]}
+
+        outputs = iter(model(data(), batch_size=batch_size, num_workers=0))
+        results: list[TranscriptionResult] = []
+
+        for vad_segments in vad_segments_by_audio:
+            segments = []
+
+            # Each audio owns as many outputs as speech segments it was split into
+            for vad_segment in vad_segments:
+                text = next(outputs)["text"]
+
+                if batch_size in [0, 1]:
+                    text = text[0]
+
+                segments.append(
+                    {
+                        "text": text,
+                        "start": round(vad_segment["start"], 3),
+                        "end": round(vad_segment["end"], 3),
+                    }
+                )
+
+            results.append(
+                {"segments": segments, "language": model.tokenizer.language_code}
+            )
+
+        return results
+
+    @staticmethod
+    def _should_align(transcription: Transcription) -> bool:
+        """
+        Check whether the transcription has to be aligned, which is only needed when
+        generating subtitles.
+
+        :param transcription: An instance of Transcription containing the options of
+                              the transcription.
+        :type transcription: Transcription
+        :return: True if any of the output file types is a subtitle format.
+        :rtype: bool
+        """
+        output_file_types = transcription.output_file_types or []
+
+        return "srt" in output_file_types or "vtt" in output_file_types
+
+    def _align(
+        self,
+        result: Union["TranscriptionResult", "AlignedTranscriptionResult"],
+        audio: Any,
+        language_code: Optional[str],
+        device: str,
+    ) -> "AlignedTranscriptionResult":
+        """
+        Align the segments of a transcription result to get word-level timestamps.
+
+        :param result: The transcription result to align.
+        :type result: Union[TranscriptionResult, AlignedTranscriptionResult]
+        :param audio: The decoded audio the result was transcribed from.
+        :type audio: Any
+        :param language_code: The language code of the audio.
+        :type language_code: Optional[str]
+        :param device: The device where the model will run ("cpu" or "cuda").
+        :type device: str
+        :return: The aligned transcription result.
+        :rtype: AlignedTranscriptionResult
+        """
+        import whisperx
 
-                # https://github.com/m-bain/whisperX/issues/455#issuecomment-1707547704
-                if self._whisperx_result:
-                    self._whisperx_result["language"] = "en"
+        model_aligned, metadata = self._get_align_model(language_code, device)
 
-                writer(self._whisperx_result, file_path, vars(config_subtitles))
+        return whisperx.align(
+            result["segments"],
+            model_aligned,
+            metadata,
+            audio,
+            device,
+            return_char_alignments=False,
+        )
@@ -2,33 +2,44 @@ import traceback
 from pathlib import Path
 from typing import Optional
 
-from pytubefix import YouTube
-
 
 class YouTubeHandler:
     @staticmethod
     def download_audio_from_video(
         url: str,
         output_path: str = ".",
-        output_filename: str = "yt-audio.mp3",
+        output_filename: str = "yt-audio",
     ) -> Optional[Path]:
         """
         Downloads audio from a YouTube video.
 
+        The best available audio stream is downloaded in several fragments at the
+        same time and saved as is, without re-encoding it, so the extension of the
+        file depends on the format of the stream.
+
         :param url: The URL of the YouTube video.
         :param output_path: (Optional) The directory where the audio file will be saved.
                             Default is the current directory.
-        :param output_filename: (Optional) The name of the audio file to be saved.
-                                 Default is "yt-audio.mp3".
+        :param output_filename: (Optional) The name of the audio file to be saved,
+                                without extension. Default is "yt-audio".
         :return: The path to the downloaded audio file as a Path object,
                  or None if the download fails.
         """
         try:
-            yt = YouTube(url)
-            stream = yt.streams.filter(only_audio=True).first()
-            output_file = stream.download(
-                output_path=output_path, filename=output_filename
-            )
+            # Imported here to avoid loading yt-dlp until it's needed
+            from yt_dlp import YoutubeDL
+
+            options = {
+                "format": "bestaudio",
+                "outtmpl": str(Path(output_path) / f"{output_filename}.%(ext)s"),
+                "concurrent_fragment_downloads": 8,
+                "noplaylist": True,
+                "quiet": True,
+            }
+
+            with YoutubeDL(options) as ydl:
+                info = ydl.extract_info(url, download=True)
+                output_file = ydl.prepare_filename(info) if info else None
 
             return Path(output_file) if output_file else None
 
@@ -9,6 +9,7 @@ class ConfigTranscription:
     method: str
     autosave: bool
     overwrite_files: bool
+    max_concurrent_files: int
 
     class Key(Enum):
         """
@@ -21,6 +22,7 @@ class ConfigTranscription:
         METHOD = "method"
         AUTOSAVE = "autosave"
         OVERWRITE_FILES = "overwrite_files"
+        MAX_CONCURRENT_FILES = "max_concurrent_files"
 
         def value_type(self) -> str:
             """
@@ -35,6 +37,7 @@ class ConfigTranscription:
                 ConfigTranscription.Key.METHOD: "str",
                 ConfigTranscription.Key.AUTOSAVE: "bool",
                 ConfigTranscription.Key.OVERWRITE_FILES: "bool",
+                ConfigTranscription.Key.MAX_CONCURRENT_FILES: "int",
             }
 
             return str(type_mapping.get(self))
@@ -13,6 +13,7 @@ class ConfigWhisperX:
     use_cpu: bool
     can_use_gpu: bool
     output_file_types: list[OutputFileTypes]
+    cache_transcriptions: bool
 
     class Key(Enum):
         """
@@ -26,6 +27,7 @@ class ConfigWhisperX:
         USE_CPU = "use_cpu"
         CAN_USE_GPU = "can_use_gpu"
         OUTPUT_FILE_TYPES = "output_file_types"
+        CACHE_TRANSCRIPTIONS = "cache_transcriptions"
 
         def value_type(self) -> str:
             """
@@ -41,6 +43,7 @@ class ConfigWhisperX:
                 ConfigWhisperX.Key.USE_CPU: "bool",
                 ConfigWhisperX.Key.CAN_USE_GPU: "bool",
                 ConfigWhisperX.Key.OUTPUT_FILE_TYPES: "list",
+                ConfigWhisperX.Key.CACHE_TRANSCRIPTIONS: "bool",
             }
 
             return str(type_mapping.get(self))
@@ -1,10 +1,19 @@
+import wave
+
+import numpy as np
 import speech_recognition as sr
 from pydub import AudioSegment
+from pydub.utils import db_to_float
+
+# Whisper works with 16 kHz audio, so recordings are saved at that rate to avoid
+# resampling them again when transcribing
+RECORDING_SAMPLE_RATE = 16000
+RECORDING_SAMPLE_WIDTH = 2
 
 
 def save_audio_data(audio_data: list[sr.AudioData], filename: str) -> None:
     """
-    Save recorded audio data to a WAV file.
+    Save recorded audio data to a 16 kHz, 16-bit mono WAV file.
 
     :param audio_data: A list of recorded audio chunks.
     :type audio_data: list[sr.AudioData]
@@ -16,21 +25,96 @@ def save_audio_data(audio_data: list[sr.AudioData], filename: str) -> None:
     if audio_data:
         raw_audio_data = b"".join(
             [
-                chunk.get_raw_data(convert_rate=None, convert_width=None)
+                chunk.get_raw_data(
+                    convert_rate=RECORDING_SAMPLE_RATE,
+                    convert_width=RECORDING_SAMPLE_WIDTH,
+                )
                 for chunk in audio_data
             ]
         )
-        audio = AudioSegment(
-            raw_audio_data,
-            sample_width=audio_data[0].sample_width,
-            frame_rate=audio_data[0].sample_rate,
-            channels=1,
-        )
 
-        try:
-            audio.export(filename, format="wav")
-            print(f"Audio data saved to {filename}")
-        except sr.UnknownValueError:
-            print("Could not save audio data. Unknown value error.")
-        except sr.RequestError as e:
-            print(f"Could not request results; {e}")
+        with wave.open(filename, "wb") as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(RECORDING_SAMPLE_WIDTH)
+            wav_file.setframerate(RECORDING_SAMPLE_RATE)
+            wav_file.writeframes(raw_audio_data)
+
+        print(f"Audio data saved to {filename}")
+
+
+def split_on_silence(
+    sound: AudioSegment,
+    min_silence_len: int,
+    silence_thresh: float,
+    keep_silence: int,
+) -> list[AudioSegment]:
+    """
+    Split an audio segment into chunks on its silent parts.
+
+    It behaves like `pydub.silence.split_on_silence` with a seek step of 1 ms, but the
+    loudness of every window is computed at once with NumPy instead of slicing the
+    audio in a Python loop.
+
+    :param sound: The AudioSegment object to be split.
+    :type sound: AudioSegment
+    :param min_silence_len: Minimum duration of silence, in milliseconds, required
+                            to split the audio.
+    :type min_silence_len: int
+    :param silence_thresh: Level in dBFS under which the audio is considered silence.
+    :type silence_thresh: float
+    :param keep_silence: Milliseconds of silence to keep before and after each chunk.
+    :type keep_silence: int
+    :return: List of audio chunks.
+    :rtype: list[AudioSegment]
+    """
+    samples = np.asarray(sound.get_array_of_samples(), dtype=np.float32)
+    power = np.square(samples).reshape(-1, sound.channels).mean(axis=1)
+    frame_count = len(power)
+
+    if frame_count == 0:
+        return []
+
+    # Sum the power of the frames of each millisecond
+    ms_starts = (np.arange(len(sound)) * sound.frame_rate) // 1000
+    ms_starts = ms_starts[ms_starts < frame_count]
+    ms_power = np.add.reduceat(power, ms_starts).astype(np.float64)
+    ms_frames = np.diff(np.append(ms_starts, frame_count))
+    ms_count = len(ms_starts)
+
+    # Mean power of every window of `min_silence_len` ms, one per millisecond
+    is_silent_ms = np.zeros(ms_count, dtype=bool)
+
+    if ms_count >= min_silence_len:
+        power_sums = np.concatenate(([0.0], np.cumsum(ms_power)))
+        frame_sums = np.concatenate(([0], np.cumsum(ms_frames)))
+        window_power = (
+            power_sums[min_silence_len:] - power_sums[:-min_silence_len]
+        ) / np.maximum(frame_sums[min_silence_len:] - frame_sums[:-min_silence_len], 1)
+
+        thresh_rms = db_to_float(silence_thresh) * sound.max_possible_amplitude
+        # Truncate the RMS to an integer as `audioop.rms` does, so that the windows
+        # considered silent are the same as with pydub
+        window_rms = np.floor(np.sqrt(window_power))
+        silent_window_starts = np.flatnonzero(window_rms <= thresh_rms)
+
+        # Mark every millisecond covered by at least one silent window
+        coverage = np.zeros(ms_count + 1, dtype=np.int64)
+        coverage[silent_window_starts] += 1
+        coverage[silent_window_starts + min_silence_len] -= 1
+        is_silent_ms = np.cumsum(coverage[:-1]) > 0
+
+    # Find the start and end of each non-silent range
+    is_sound_ms = np.concatenate(([False], ~is_silent_ms, [False]))
+    changes = np.flatnonzero(np.diff(is_sound_ms.astype(np.int8)))
+    output_ranges = [
+        [int(start) - keep_silence, int(end) + keep_silence]
+        for start, end in changes.reshape(-1, 2)
+    ]
+
+    # Split the kept silence between ranges that would overlap
+    for range_i, range_ii in zip(output_ranges, output_ranges[1:]):
+        if range_ii[0] < range_i[1]:
+            range_i[1] = (range_i[1] + range_ii[0]) // 2
+            range_ii[0] = range_i[1]
+
+    return [sound[max(start, 0) : min(end, len(sound))] for start, end in output_ranges]
@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Optional
+
+from utils.path_helper import ROOT_PATH
+
+# PyInstaller bundles run from a directory that may be temporary or read-only, so
+# the cache is kept in the user's cache directory instead
+if getattr(sys, "frozen", False):
+    CACHE_DIR_PATH = Path.home() / ".cache" / "audiotext"
+else:
+    CACHE_DIR_PATH = ROOT_PATH / ".transcribe_cache"
+
+# Once the cache grows bigger than this, the least recently used entries are removed
+MAX_CACHE_SIZE = 256 * 1024 * 1024  # 256 MiB
+
+_HASH_BLOCK_SIZE = 1024 * 1024  # 1 MiB
+
+
+def get_cache_key(file_path: Path, options: tuple[Any, ...]) -> str:
+    """
+    Get the key under which the transcription of a file is cached.
+
+    The file is identified by a hash of its content, so the cached transcription is
+    found even if the file is moved or renamed. The options that change the result
+    of the transcription are hashed separately and appended to it.
+
+    :param file_path: The path of the transcribed file.
+    :type file_path: Path
+    :param options: The options the file is transcribed with.
+    :type options: tuple[Any, ...]
+    :return: The cache key.
+    :rtype: str
+    """
+    file_hash = hashlib.blake2b(digest_size=16)
+
+    with open(file_path, "rb") as file:
+        while block := file.read(_HASH_BLOCK_SIZE):
+            file_hash.update(block)
+
+    options_hash = hashlib.blake2b(repr(options).encode("utf-8"), digest_size=8)
+
+    return f"{file_hash.hexdigest()}_{options_hash.hexdigest()}"
+
+
+def load_cached_transcription(cache_key: str) -> Optional[dict[str, Any]]:
+    """
+    Load a cached transcription.
+
+    :param cache_key: The key of the cached transcription.
+    :type cache_key: str
+    :return: The cached data, or None if there is no valid cache entry for the key.
+    :rtype: Optional[dict[str, Any]]
+    """
+    cache_file_path = CACHE_DIR_PATH / f"{cache_key}.json"
+
+    try:
+        data: dict[str, Any] = json.loads(cache_file_path.read_bytes())
+        # Mark the entry as recently used so it's the last one to be removed
+        os.utime(cache_file_path)
+        return data
+    except (OSError, ValueError):
+        return None
+
+
+def save_cached_transcription(cache_key: str, data: dict[str, Any]) -> None:
+    """
+    Save a transcription to the cache. Failing to do so doesn't stop the
+    transcription, so errors are only printed.
+
+    :param cache_key: The key of the transcription to cache.
+    :type cache_key: str
+    :param data: The data to cache. It must be serializable to JSON.
+    :type data: dict[str, Any]
+    :return: None
+    """
+    cache_file_path = CACHE_DIR_PATH / f"{cache_key}.json"
+    tmp_file_path = cache_file_path.with_suffix(".tmp")
+
+    try:
+        CACHE_DIR_PATH.mkdir(parents=True, exist_ok=True)
+        tmp_file_path.write_bytes(
+            json.dumps(data, default=_to_json_compatible).encode("utf-8")
+        )
+        # Replace the file at once so that a cache entry is never read half written
+        tmp_file_path.replace(cache_file_path)
+        _remove_least_recently_used()
+    except (OSError, TypeError) as e:
+        print(f"Could not cache the transcription: {e!r}")
+
+
+def _remove_least_recently_used() -> None:
+    """
+    Remove the least recently used cache entries until the cache fits within
+    `MAX_CACHE_SIZE`.
+
+    :return: None
+    """
+    entries = []
+
+    with os.scandir(CACHE_DIR_PATH) as it:
+        for entry in it:
+            if entry.name.endswith(".json") and entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    cache_size = sum(size for _, size, _ in entries)
+
+    for _, size, path in sorted(entries):
+        if cache_size <= MAX_CACHE_SIZE:
+            break
+
+        Path(path).unlink(missing_ok=True)
+        cache_size -= size
+
+
+def _to_json_compatible(value: Any) -> Any:
+    """
+    Convert values that the `json` module can't serialize, such as the NumPy scalars
+    in WhisperX results.
+
+    :param value: The value to convert.
+    :type value: Any
+    :raises TypeError: If the value can't be converted.
+    :return: The converted value.
+    :rtype: Any
+    """
+    if hasattr(value, "tolist"):
+        return value.tolist()
+
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
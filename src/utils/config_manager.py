@@ -78,6 +78,9 @@ class ConfigManager:
             overwrite_files=ConfigManager.get_value(  # type: ignore
                 section, ConfigTranscription.Key.OVERWRITE_FILES
             ),
+            max_concurrent_files=ConfigManager.get_value(  # type: ignore
+                section, ConfigTranscription.Key.MAX_CONCURRENT_FILES
+            ),
         )
 
     @staticmethod
@@ -119,6 +122,9 @@ class ConfigManager:
             output_file_types=ConfigManager.get_value(  # type: ignore
                 section, ConfigWhisperX.Key.OUTPUT_FILE_TYPES
             ),
+            cache_transcriptions=ConfigManager.get_value(  # type: ignore
+                section, ConfigWhisperX.Key.CACHE_TRANSCRIPTIONS
+            ),
         )
 
     @staticmethod
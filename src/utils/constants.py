@@ -142,3 +142,8 @@ VIDEO_FILE_EXTENSIONS = [
 # fmt: on
 
 SUPPORTED_FILE_EXTENSIONS = AUDIO_FILE_EXTENSIONS + VIDEO_FILE_EXTENSIONS
+
+# Sets for fast membership checks
+AUDIO_FILE_EXTENSIONS_SET = frozenset(AUDIO_FILE_EXTENSIONS)
+VIDEO_FILE_EXTENSIONS_SET = frozenset(VIDEO_FILE_EXTENSIONS)
+SUPPORTED_FILE_EXTENSIONS_SET = AUDIO_FILE_EXTENSIONS_SET | VIDEO_FILE_EXTENSIONS_SET
@@ -21,7 +21,9 @@ class Color(Enum):
 
 
 class ComputeType(Enum):
+    DEFAULT = "default"
     INT8 = "int8"
+    INT8_FLOAT16 = "int8_float16"
     FLOAT16 = "float16"
     FLOAT32 = "float32"
 